@@ -1,53 +1,83 @@
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, Form
 from database import db
+from session_table import SessionTable
 import json
+import os
+import re
+import time
+
+# Also used as the session cookie max_age in routes.auth_routes.signin
+SESSION_TTL = 3600 * 24 * 7
+SESSION_ID_BYTES = 16
+
+_USERNAME_RE = re.compile(r"[A-Za-z0-9_]{3,32}").fullmatch
 
 class AuthController:
     """Handle user authentication and session management."""
     
     def __init__(self):
-        self.active_sessions = {}  # Simple in-memory session storage
+        self.active_sessions = SessionTable()  # In-memory session storage
     
-    def create_session(self, user_id: int, username: str) -> str:
-        """Create a new session and return session ID."""
-        import uuid
-        session_id = str(uuid.uuid4())
+    @staticmethod
+    def _session_key(session_id: str) -> Optional[bytes]:
+        """Decode a hex session cookie value to the raw 16-byte table key."""
+        try:
+            key = bytes.fromhex(session_id)
+        except ValueError:
+            return None
+        return key if len(key) == SESSION_ID_BYTES else None
+    
+    def create_session(self, user: Dict[str, Any]) -> bytes:
+        """Create a new session and return the raw session ID.
         
-        self.active_sessions[session_id] = {
-            "user_id": user_id,
-            "username": username,
-            "created_at": "2024-01-01"  # Simplified timestamp
-        }
+        The user's ``id``/``username``/``email`` are cached in the session, so
+        later requests don't need to query the database. Callers hex-encode
+        the ID only when it leaves the process (the cookie).
+        """
+        session_id = os.urandom(SESSION_ID_BYTES)
+        
+        self.active_sessions.insert(
+            session_id,
+            {"id": user["id"], "username": user["username"], "email": user["email"]},
+            int(time.monotonic()) + SESSION_TTL
+        )
         
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session data by session ID."""
-        return self.active_sessions.get(session_id)
+        key = self._session_key(session_id)
+        if key is None:
+            return None
+        
+        user = self.active_sessions.get(key, int(time.monotonic()))
+        if user is None:
+            return None
+        return {"user_id": user["id"], "username": user["username"]}
     
-    def delete_session(self, session_id: str):
-        """Delete a session."""
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a session. Returns True if it existed."""
+        key = self._session_key(session_id)
+        return key is not None and self.active_sessions.remove(key)
     
     def signup(self, username: str, password: str, email: Optional[str] = None) -> Dict[str, Any]:
         """Handle user signup."""
-        if len(username) < 3:
-            raise HTTPException(status_code=400, detail="Username must be at least 3 characters")
+        if not _USERNAME_RE(username):
+            raise HTTPException(
+                status_code=400,
+                detail="Username must be 3-32 characters of letters, digits or underscores"
+            )
         
         if len(password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
         # Create user in database
-        success = db.create_user(username, password, email)
+        user = db.create_user(username, password, email)
         
-        if not success:
+        if not user:
             raise HTTPException(status_code=400, detail="Username already exists")
         
-        # Get the created user
-        user = db.get_user_by_id(db.authenticate_user(username, password))
-        
         return {
             "success": True,
             "message": "User created successfully",
@@ -60,16 +90,13 @@ class AuthController:
     
     def signin(self, username: str, password: str) -> Dict[str, Any]:
         """Handle user signin."""
-        user_id = db.authenticate_user(username, password)
+        user = db.authenticate_user(username, password)
         
-        if not user_id:
+        if not user:
             raise HTTPException(status_code=401, detail="Invalid username or password")
         
-        # Get user details
-        user = db.get_user_by_id(user_id)
-        
         # Create session
-        session_id = self.create_session(user_id, user["username"])
+        session_id = self.create_session(user)
         
         return {
             "success": True,
@@ -84,22 +111,22 @@ class AuthController:
     
     def signout(self, session_id: str) -> Dict[str, Any]:
         """Handle user signout."""
-        if session_id in self.active_sessions:
-            self.delete_session(session_id)
+        if self.delete_session(session_id):
             return {"success": True, "message": "Sign out successful"}
         else:
             return {"success": False, "message": "Session not found"}
     
     def get_current_user(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get current user from session."""
-        session = self.get_session(session_id)
-        if session:
-            return db.get_user_by_id(session["user_id"])
-        return None
+        """Get current user from the session cache."""
+        key = self._session_key(session_id)
+        if key is None:
+            return None
+        return self.active_sessions.get(key, int(time.monotonic()))
     
     def is_authenticated(self, session_id: str) -> bool:
         """Check if user is authenticated."""
-        return session_id in self.active_sessions
+        key = self._session_key(session_id)
+        return key is not None and self.active_sessions.get(key, int(time.monotonic())) is not None
 
 # Global auth controller instance
 auth_controller = AuthController()
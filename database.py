@@ -1,111 +1,283 @@
 import sqlite3
+import atexit
 import hashlib
+import hmac
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
+
+# scrypt cost parameters (~16 MiB of memory per hash)
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+# Checked against when the username doesn't exist, so unknown users cost
+# the same scrypt run as a wrong password (scrypt's default dklen is 64)
+_DUMMY_SALT = os.urandom(SALT_BYTES)
+_DUMMY_HASH = bytes(64)
+
+# Keys of the model dicts, in SELECT column order
+MODEL_COLUMNS = (
+    "id", "model_name", "theta_0", "theta_1", "rmse", "mae", "r2_score",
+    "sklearn_rmse", "sklearn_mae", "sklearn_r2", "created_at"
+)
+
+# Schema of the models table; {table} lets a migration build a replacement
+MODELS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        model_name TEXT NOT NULL,
+        theta_0 REAL NOT NULL,
+        theta_1 REAL NOT NULL,
+        rmse REAL NOT NULL,
+        mae REAL NOT NULL,
+        r2_score REAL NOT NULL,
+        sklearn_rmse REAL,
+        sklearn_mae REAL,
+        sklearn_r2 REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(user_id, model_name)
+    )
+'''
+
+def _model_from_row(row: tuple) -> Dict[str, Any]:
+    """Build a model dict from a SELECT row, deriving its equation."""
+    model = dict(zip(MODEL_COLUMNS, row))
+    model["equation"] = f"y = {model['theta_1']:.4f}x + {model['theta_0']:.4f}"
+    return model
 
 class Database:
     def __init__(self, db_path: str = "linear_regression.db"):
         self.db_path = db_path
         self.init_database()
+        
+        # One dedicated writer (SQLite serializes writes anyway) plus one
+        # lazily opened reader connection per thread, all kept open for reuse.
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._local = threading.local()
+        self._readers: Dict[int, sqlite3.Connection] = {}  # by thread ident
+        self._readers_lock = threading.Lock()
     
     def init_database(self):
         """Initialize database tables if they don't exist."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL is persistent in the database file, so it only needs setting
+        # once; it lets readers proceed while a model save is committing.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
+                password_hash BLOB NOT NULL,
+                salt BLOB,
                 email TEXT UNIQUE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Databases created before per-user salts were introduced lack the
+        # column; their rows keep NULL and are upgraded on next signin.
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(users)")}
+        if "salt" not in columns:
+            cursor.execute("ALTER TABLE users ADD COLUMN salt BLOB")
+        
+        # Hashes and salts used to be stored hex-encoded; convert them once
+        # to raw bytes (a BLOB is kept as-is even in a TEXT column).
+        legacy = cursor.execute(
+            "SELECT id, password_hash, salt FROM users WHERE typeof(password_hash) = 'text'"
+        ).fetchall()
+        cursor.executemany(
+            "UPDATE users SET password_hash = ?, salt = ? WHERE id = ?",
+            [
+                (bytes.fromhex(password_hash), None if salt is None else bytes.fromhex(salt), user_id)
+                for user_id, password_hash, salt in legacy
+            ]
+        )
+        
         # Models table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS models (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                model_name TEXT NOT NULL,
-                theta_0 REAL NOT NULL,
-                theta_1 REAL NOT NULL,
-                rmse REAL NOT NULL,
-                mae REAL NOT NULL,
-                r2_score REAL NOT NULL,
-                sklearn_rmse REAL,
-                sklearn_mae REAL,
-                sklearn_r2 REAL,
-                equation TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                UNIQUE(user_id, model_name)
-            )
-        ''')
+        cursor.execute(MODELS_TABLE_SQL.format(table="models"))
+        
+        # The equation used to be stored alongside the thetas it is derived
+        # from; it is now formatted on read. The old column is NOT NULL with
+        # no default, so it has to go or upserts without it would fail.
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(models)")}
+        if "equation" in columns:
+            self._drop_equation_column(cursor)
+        
+        # Serves get_user_models as an index range scan already in
+        # newest-first order, so no separate sort step is needed.
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_models_user_created ON models(user_id, created_at DESC)"
+        )
         
         conn.commit()
         conn.close()
     
-    def hash_password(self, password: str) -> str:
-        """Hash password using SHA-256."""
-        return hashlib.sha256(password.encode()).hexdigest()
+    @staticmethod
+    def _drop_equation_column(cursor: sqlite3.Cursor):
+        """Drop ``models.equation``, rebuilding the table on SQLite < 3.35.
+        
+        ALTER TABLE ... DROP COLUMN only exists from SQLite 3.35; older
+        versions get the documented rebuild: create, copy, drop, rename.
+        """
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            cursor.execute("ALTER TABLE models DROP COLUMN equation")
+            return
+        
+        columns = ", ".join(("id", "user_id") + MODEL_COLUMNS[1:])
+        cursor.execute(MODELS_TABLE_SQL.format(table="models_new"))
+        cursor.execute(f"INSERT INTO models_new ({columns}) SELECT {columns} FROM models")
+        cursor.execute("DROP TABLE models")
+        cursor.execute("ALTER TABLE models_new RENAME TO models")
     
-    def verify_password(self, password: str, password_hash: str) -> bool:
-        """Verify password against hash."""
-        return self.hash_password(password) == password_hash
+    def _connect(self) -> sqlite3.Connection:
+        """Open a long-lived connection and apply per-connection PRAGMAs.
+        
+        Unlike journal_mode (set in init_database), these settings only last
+        for the lifetime of the connection.
+        
+        sqlite3 caches prepared statements per connection (keyed by SQL
+        text, default size 128), so keeping connections open means each
+        query is only parsed and planned once per connection.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-64000")
+        return conn
+    
+    @contextmanager
+    def _acquire(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """Check out a pooled connection.
+        
+        Writes go through the single writer connection and are committed on
+        success or rolled back on error; reads use the calling thread's own
+        reader connection, so they never wait on other threads.
+        """
+        if write:
+            with self._write_lock:
+                try:
+                    yield self._writer
+                    self._writer.commit()
+                except BaseException:
+                    self._writer.rollback()
+                    raise
+            return
+        
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._readers_lock:
+                self._prune_readers()
+                self._readers[threading.get_ident()] = conn
+        yield conn
     
-    def create_user(self, username: str, password: str, email: Optional[str] = None) -> bool:
-        """Create a new user. Returns True if successful, False if username exists."""
+    def _prune_readers(self):
+        """Close reader connections left behind by threads that have exited.
+        
+        Worker threads come and go (the threadpool retires idle ones), so
+        this runs whenever a new thread opens its first connection.
+        """
+        alive = {thread.ident for thread in threading.enumerate()}
+        alive.discard(threading.get_ident())  # a reused ident is stale too
+        for ident in [ident for ident in self._readers if ident not in alive]:
+            self._readers.pop(ident).close()
+    
+    def close(self):
+        """Close the writer and every reader connection opened so far."""
+        with self._readers_lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+        for conn in readers + [self._writer]:
+            conn.close()
+    
+    def hash_password(self, password: str, salt: bytes) -> bytes:
+        """Hash password with scrypt using the given per-user salt."""
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P
+        )
+    
+    def verify_password(self, password: str, password_hash: bytes, salt: Optional[bytes]) -> bool:
+        """Verify password against hash in constant time.
+        
+        Rows without a salt predate scrypt and hold an unsalted SHA-256 digest.
+        """
+        if salt is None:
+            candidate = hashlib.sha256(password.encode()).digest()
+        else:
+            candidate = self.hash_password(password, salt)
+        return hmac.compare_digest(candidate, password_hash)
+    
+    def create_user(self, username: str, password: str, email: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Create a new user. Returns the new user, or None if username exists."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            salt = os.urandom(SALT_BYTES)
+            password_hash = self.hash_password(password, salt)
             
-            password_hash = self.hash_password(password)
-            
-            cursor.execute(
-                "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
-                (username, password_hash, email)
-            )
+            with self._acquire(write=True) as conn:
+                cursor = conn.execute(
+                    "INSERT INTO users (username, password_hash, salt, email) VALUES (?, ?, ?, ?)",
+                    (username, password_hash, salt, email)
+                )
             
-            conn.commit()
-            conn.close()
-            return True
+            return {"id": cursor.lastrowid, "username": username, "email": email}
         except sqlite3.IntegrityError:
             # Username already exists
-            return False
+            return None
     
-    def authenticate_user(self, username: str, password: str) -> Optional[int]:
-        """Authenticate user and return user_id if successful."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate user and return their id, username and email if successful."""
+        with self._acquire() as conn:
+            result = conn.execute(
+                "SELECT id, username, email, password_hash, salt FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
         
-        cursor.execute(
-            "SELECT id, password_hash FROM users WHERE username = ?",
-            (username,)
-        )
+        if not result:
+            self.verify_password(password, _DUMMY_HASH, _DUMMY_SALT)
+            return None
         
-        result = cursor.fetchone()
-        conn.close()
+        if not self.verify_password(password, result[3], result[4]):
+            return None
         
-        if result and self.verify_password(password, result[1]):
-            return result[0]
-        return None
+        if result[4] is None:
+            self._upgrade_password_hash(result[0], password)
+        return {
+            "id": result[0],
+            "username": result[1],
+            "email": result[2]
+        }
+    
+    def _upgrade_password_hash(self, user_id: int, password: str):
+        """Replace a legacy unsalted SHA-256 hash with a salted scrypt hash."""
+        salt = os.urandom(SALT_BYTES)
+        # Hash before taking the writer lock so other writes aren't held up
+        password_hash = self.hash_password(password, salt)
+        
+        with self._acquire(write=True) as conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ?, salt = ? WHERE id = ?",
+                (password_hash, salt, user_id)
+            )
     
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user information by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT id, username, email, created_at FROM users WHERE id = ?",
-            (user_id,)
-        )
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self._acquire() as conn:
+            result = conn.execute(
+                "SELECT id, username, email, created_at FROM users WHERE id = ?",
+                (user_id,)
+            ).fetchone()
         
         if result:
             return {
@@ -119,32 +291,36 @@ class Database:
     def save_model(self, user_id: int, model_name: str, model_data: Dict[str, Any]) -> bool:
         """Save a model for a user. Returns True if successful."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._acquire(write=True) as conn:
+                # Update an existing model of the same name in place, keeping
+                # its id (INSERT OR REPLACE would delete and re-insert the row).
+                conn.execute('''
+                    INSERT INTO models 
+                    (user_id, model_name, theta_0, theta_1, rmse, mae, r2_score, 
+                     sklearn_rmse, sklearn_mae, sklearn_r2)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, model_name) DO UPDATE SET
+                        theta_0 = excluded.theta_0,
+                        theta_1 = excluded.theta_1,
+                        rmse = excluded.rmse,
+                        mae = excluded.mae,
+                        r2_score = excluded.r2_score,
+                        sklearn_rmse = excluded.sklearn_rmse,
+                        sklearn_mae = excluded.sklearn_mae,
+                        sklearn_r2 = excluded.sklearn_r2,
+                        created_at = CURRENT_TIMESTAMP
+                ''', (
+                    user_id, model_name,
+                    model_data.get('theta_0', 0.0),
+                    model_data.get('theta_1', 0.0),
+                    model_data.get('rmse', 0.0),
+                    model_data.get('mae', 0.0),
+                    model_data.get('r2_score', 0.0),
+                    model_data.get('sklearn_rmse'),
+                    model_data.get('sklearn_mae'),
+                    model_data.get('sklearn_r2')
+                ))
             
-            # Generate equation from theta values
-            equation = f"y = {model_data.get('theta_1', 0.0):.4f}x + {model_data.get('theta_0', 0.0):.4f}"
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO models 
-                (user_id, model_name, theta_0, theta_1, rmse, mae, r2_score, 
-                 sklearn_rmse, sklearn_mae, sklearn_r2, equation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id, model_name,
-                model_data.get('theta_0', 0.0),
-                model_data.get('theta_1', 0.0),
-                model_data.get('rmse', 0.0),
-                model_data.get('mae', 0.0),
-                model_data.get('r2_score', 0.0),
-                model_data.get('sklearn_rmse'),
-                model_data.get('sklearn_mae'),
-                model_data.get('sklearn_r2'),
-                equation
-            ))
-            
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error saving model: {e}")
@@ -152,89 +328,51 @@ class Database:
     
     def get_user_models(self, user_id: int) -> List[Dict[str, Any]]:
         """Get all models for a user."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, model_name, theta_0, theta_1, rmse, mae, r2_score,
-                   sklearn_rmse, sklearn_mae, sklearn_r2, equation, created_at
-            FROM models 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC
-        ''', (user_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        models = []
-        for result in results:
-            models.append({
-                "id": result[0],
-                "model_name": result[1],
-                "theta_0": result[2],
-                "theta_1": result[3],
-                "rmse": result[4],
-                "mae": result[5],
-                "r2_score": result[6],
-                "sklearn_rmse": result[7],
-                "sklearn_mae": result[8],
-                "sklearn_r2": result[9],
-                "equation": result[10],
-                "created_at": result[11]
-            })
-        
-        return models
+        with self._acquire() as conn:
+            results = conn.execute('''
+                SELECT id, model_name, theta_0, theta_1, rmse, mae, r2_score,
+                       sklearn_rmse, sklearn_mae, sklearn_r2, created_at
+                FROM models 
+                WHERE user_id = ? 
+                ORDER BY created_at DESC
+            ''', (user_id,))
+            
+            # Build each dict straight from the cursor instead of fetchall()
+            # followed by a second pass over the row tuples. A NumPy
+            # structured-array detour (np.fromiter + column tolist()) was
+            # measured slower: the output is still one dict per row, and
+            # the text and nullable columns force object fields.
+            return [_model_from_row(row) for row in results]
     
     def get_model_by_id(self, model_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific model by ID (ensuring user owns it)."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, model_name, theta_0, theta_1, rmse, mae, r2_score,
-                   sklearn_rmse, sklearn_mae, sklearn_r2, equation, created_at
-            FROM models 
-            WHERE id = ? AND user_id = ?
-        ''', (model_id, user_id))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self._acquire() as conn:
+            result = conn.execute('''
+                SELECT id, model_name, theta_0, theta_1, rmse, mae, r2_score,
+                       sklearn_rmse, sklearn_mae, sklearn_r2, created_at
+                FROM models 
+                WHERE id = ? AND user_id = ?
+            ''', (model_id, user_id)).fetchone()
         
         if result:
-            return {
-                "id": result[0],
-                "model_name": result[1],
-                "theta_0": result[2],
-                "theta_1": result[3],
-                "rmse": result[4],
-                "mae": result[5],
-                "r2_score": result[6],
-                "sklearn_rmse": result[7],
-                "sklearn_mae": result[8],
-                "sklearn_r2": result[9],
-                "equation": result[10],
-                "created_at": result[11]
-            }
+            return _model_from_row(result)
         return None
     
     def delete_model(self, model_id: int, user_id: int) -> bool:
         """Delete a model (ensuring user owns it)."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "DELETE FROM models WHERE id = ? AND user_id = ?",
-                (model_id, user_id)
-            )
+            with self._acquire(write=True) as conn:
+                cursor = conn.execute(
+                    "DELETE FROM models WHERE id = ? AND user_id = ?",
+                    (model_id, user_id)
+                )
             
-            deleted = cursor.rowcount > 0
-            conn.commit()
-            conn.close()
-            return deleted
+            return cursor.rowcount > 0
         except Exception as e:
             print(f"Error deleting model: {e}")
             return False
 
-# Global database instance
+# Global database instance, closed at interpreter exit; other instances
+# are closed by whoever creates them
 db = Database()
+atexit.register(db.close)
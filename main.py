@@ -7,7 +7,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from routes.user_routes import user_router
-from routes.auth_routes import auth_router
+from routes.auth_routes import auth_router, AuthenticationRequired, authentication_required_handler
 from fastapi.responses import HTMLResponse
 from fastapi import HTTPException
 import logging
@@ -67,6 +67,7 @@ async def guest_page() -> HTMLResponse:
 # Register all routes from the controller
 app.include_router(user_router, prefix="/api/v1")
 app.include_router(auth_router, prefix="/api/v1/auth")
+app.add_exception_handler(AuthenticationRequired, authentication_required_handler)
 
 if __name__ == "__main__":
     import uvicorn
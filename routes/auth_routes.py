@@ -1,11 +1,65 @@
-from fastapi import APIRouter, Form, HTTPException, Cookie
-from fastapi.responses import JSONResponse
-from auth_controller import auth_controller
+from fastapi import APIRouter, Form, HTTPException, Cookie, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
+from auth_controller import auth_controller, SESSION_TTL
 from database import db
-from typing import Optional
+from typing import Optional, Dict, Any
+import orjson
 
 auth_router = APIRouter()
 
+# Pre-serialized bodies for the fixed unauthenticated replies
+_UNAUTHENTICATED_BODY = orjson.dumps({"authenticated": False})
+_AUTH_REQUIRED_BODY = orjson.dumps({"success": False, "detail": "Authentication required"})
+_INVALID_SESSION_BODY = orjson.dumps({"success": False, "detail": "Invalid session"})
+
+def _prebuilt(body: bytes, status_code: int = 200) -> Response:
+    """Return a pre-serialized JSON body without re-serializing it.
+    
+    A fresh Response is built each time because middleware (CORS) edits
+    the header list of the response being sent, so instances can't be shared.
+    """
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+class AuthenticationRequired(HTTPException):
+    """Raised by :func:`require_user`; carries the pre-serialized 401 body.
+    
+    main registers :func:`authentication_required_handler` to send that
+    body. An app that includes ``auth_router`` without the handler still
+    answers 401 through FastAPI's HTTPException handler, just with a
+    plain ``{"detail": ...}`` body.
+    """
+    
+    def __init__(self, body: bytes, detail: str):
+        super().__init__(status_code=401, detail=detail)
+        self.body = body
+
+async def authentication_required_handler(request: Request, exc: AuthenticationRequired) -> Response:
+    """Render :class:`AuthenticationRequired` as its 401 reply (registered in main)."""
+    return _prebuilt(exc.body, status_code=401)
+
+async def optional_user(request: Request, session_id: Optional[str] = Cookie(None)) -> Optional[Dict[str, Any]]:
+    """Resolve the session cookie to the cached user, or None.
+    
+    FastAPI caches dependency results per request, so routes and
+    sub-dependencies share a single lookup; the user is also exposed
+    as ``request.state.user``.
+    """
+    user = auth_controller.get_current_user(session_id) if session_id else None
+    request.state.user = user
+    return user
+
+async def require_user(
+    session_id: Optional[str] = Cookie(None),
+    user: Optional[Dict[str, Any]] = Depends(optional_user)
+) -> Dict[str, Any]:
+    """Return the current user or reject the request with a 401."""
+    if user is None:
+        if session_id:
+            raise AuthenticationRequired(_INVALID_SESSION_BODY, "Invalid session")
+        raise AuthenticationRequired(_AUTH_REQUIRED_BODY, "Authentication required")
+    return user
+
 @auth_router.post("/signup")
 async def signup(
     username: str = Form(...),
@@ -14,10 +68,13 @@ async def signup(
 ):
     """User signup endpoint."""
     try:
-        result = auth_controller.signup(username, password, email)
-        return JSONResponse(content=result, status_code=201)
+        # Database calls block, so they run on worker threads to keep the
+        # event loop free. Password hashing also releases the GIL, so a burst
+        # of signups/signins is hashed in parallel.
+        result = await run_in_threadpool(auth_controller.signup, username, password, email)
+        return ORJSONResponse(content=result, status_code=201)
     except HTTPException as e:
-        return JSONResponse(content={"success": False, "detail": e.detail}, status_code=e.status_code)
+        return ORJSONResponse(content={"success": False, "detail": e.detail}, status_code=e.status_code)
 
 @auth_router.post("/signin")
 async def signin(
@@ -26,35 +83,33 @@ async def signin(
 ):
     """User signin endpoint."""
     try:
-        result = auth_controller.signin(username, password)
-        response = JSONResponse(content=result, status_code=200)
+        result = await run_in_threadpool(auth_controller.signin, username, password)
+        session_id = result["session_id"].hex()
+        result["session_id"] = session_id
+        response = ORJSONResponse(content=result, status_code=200)
         # Set session cookie
-        response.set_cookie(key="session_id", value=result["session_id"], httponly=True, max_age=3600*24*7)  # 7 days
+        response.set_cookie(key="session_id", value=session_id, httponly=True, max_age=SESSION_TTL)
         return response
     except HTTPException as e:
-        return JSONResponse(content={"success": False, "detail": e.detail}, status_code=e.status_code)
+        return ORJSONResponse(content={"success": False, "detail": e.detail}, status_code=e.status_code)
 
 @auth_router.post("/signout")
 async def signout(session_id: Optional[str] = Cookie(None)):
     """User signout endpoint."""
     if not session_id:
-        return JSONResponse(content={"success": False, "detail": "No active session"}, status_code=400)
+        return ORJSONResponse(content={"success": False, "detail": "No active session"}, status_code=400)
     
     result = auth_controller.signout(session_id)
-    response = JSONResponse(content=result, status_code=200)
+    response = ORJSONResponse(content=result, status_code=200)
     # Clear session cookie
     response.delete_cookie(key="session_id")
     return response
 
 @auth_router.get("/me")
-async def get_current_user(session_id: Optional[str] = Cookie(None)):
+async def get_current_user(user: Optional[Dict[str, Any]] = Depends(optional_user)):
     """Get current user information."""
-    if not session_id:
-        return JSONResponse(content={"authenticated": False}, status_code=200)
-    
-    user = auth_controller.get_current_user(session_id)
     if user:
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "authenticated": True,
             "user": {
                 "id": user["id"],
@@ -63,7 +118,7 @@ async def get_current_user(session_id: Optional[str] = Cookie(None)):
             }
         }, status_code=200)
     else:
-        return JSONResponse(content={"authenticated": False}, status_code=200)
+        return _prebuilt(_UNAUTHENTICATED_BODY)
 
 @auth_router.post("/save-model")
 async def save_model(
@@ -76,16 +131,9 @@ async def save_model(
     sklearn_rmse: Optional[float] = Form(None),
     sklearn_mae: Optional[float] = Form(None),
     sklearn_r2: Optional[float] = Form(None),
-    session_id: Optional[str] = Cookie(None)
+    user: Dict[str, Any] = Depends(require_user)
 ):
     """Save a trained model for the current user."""
-    if not session_id:
-        return JSONResponse(content={"success": False, "detail": "Authentication required"}, status_code=401)
-    
-    user = auth_controller.get_current_user(session_id)
-    if not user:
-        return JSONResponse(content={"success": False, "detail": "Invalid session"}, status_code=401)
-    
     model_data = {
         "theta_0": theta_0,
         "theta_1": theta_1,
@@ -97,54 +145,33 @@ async def save_model(
         "sklearn_r2": sklearn_r2
     }
     
-    success = db.save_model(user["id"], model_name, model_data)
+    success = await run_in_threadpool(db.save_model, user["id"], model_name, model_data)
     
     if success:
-        return JSONResponse(content={"success": True, "message": "Model saved successfully"}, status_code=200)
+        return ORJSONResponse(content={"success": True, "message": "Model saved successfully"}, status_code=200)
     else:
-        return JSONResponse(content={"success": False, "detail": "Failed to save model"}, status_code=500)
+        return ORJSONResponse(content={"success": False, "detail": "Failed to save model"}, status_code=500)
 
 @auth_router.get("/models")
-async def get_user_models(session_id: Optional[str] = Cookie(None)):
+async def get_user_models(user: Dict[str, Any] = Depends(require_user)):
     """Get all models for the current user."""
-    if not session_id:
-        return JSONResponse(content={"success": False, "detail": "Authentication required"}, status_code=401)
-    
-    user = auth_controller.get_current_user(session_id)
-    if not user:
-        return JSONResponse(content={"success": False, "detail": "Invalid session"}, status_code=401)
-    
-    models = db.get_user_models(user["id"])
-    return JSONResponse(content={"success": True, "models": models}, status_code=200)
+    models = await run_in_threadpool(db.get_user_models, user["id"])
+    return ORJSONResponse(content={"success": True, "models": models}, status_code=200)
 
 @auth_router.get("/models/{model_id}")
-async def get_model(model_id: int, session_id: Optional[str] = Cookie(None)):
+async def get_model(model_id: int, user: Dict[str, Any] = Depends(require_user)):
     """Get a specific model by ID."""
-    if not session_id:
-        return JSONResponse(content={"success": False, "detail": "Authentication required"}, status_code=401)
-    
-    user = auth_controller.get_current_user(session_id)
-    if not user:
-        return JSONResponse(content={"success": False, "detail": "Invalid session"}, status_code=401)
-    
-    model = db.get_model_by_id(model_id, user["id"])
+    model = await run_in_threadpool(db.get_model_by_id, model_id, user["id"])
     if not model:
-        return JSONResponse(content={"success": False, "detail": "Model not found"}, status_code=404)
+        return ORJSONResponse(content={"success": False, "detail": "Model not found"}, status_code=404)
     
-    return JSONResponse(content={"success": True, "model": model}, status_code=200)
+    return ORJSONResponse(content={"success": True, "model": model}, status_code=200)
 
 @auth_router.delete("/models/{model_id}")
-async def delete_model(model_id: int, session_id: Optional[str] = Cookie(None)):
+async def delete_model(model_id: int, user: Dict[str, Any] = Depends(require_user)):
     """Delete a model by ID."""
-    if not session_id:
-        return JSONResponse(content={"success": False, "detail": "Authentication required"}, status_code=401)
-    
-    user = auth_controller.get_current_user(session_id)
-    if not user:
-        return JSONResponse(content={"success": False, "detail": "Authentication required"}, status_code=401)
-    
-    success = db.delete_model(model_id, user["id"])
+    success = await run_in_threadpool(db.delete_model, model_id, user["id"])
     if success:
-        return JSONResponse(content={"success": True, "message": "Model deleted successfully"}, status_code=200)
+        return ORJSONResponse(content={"success": True, "message": "Model deleted successfully"}, status_code=200)
     else:
-        return JSONResponse(content={"success": False, "detail": "Model not found or deletion failed"}, status_code=404)
+        return ORJSONResponse(content={"success": False, "detail": "Model not found or deletion failed"}, status_code=404)
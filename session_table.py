@@ -0,0 +1,62 @@
+"""In-memory session store keyed by raw session ID bytes.
+
+Each entry holds the cached user record (``id``/``username``/``email``),
+so authenticated requests never go back to the database, together with
+its expiry.  Expired sessions are reaped lazily from a min-heap of
+expiries on lookup, so memory stays bounded by the number of sessions
+created per TTL.
+"""
+
+import heapq
+import threading
+from typing import Optional, List, Tuple, Dict, Any
+
+
+class SessionTable:
+    """Session store backed by a ``dict`` plus an expiry heap."""
+    
+    def __init__(self):
+        self._sessions: Dict[bytes, Tuple[Dict[str, Any], int]] = {}
+        self._expiry_heap: List[Tuple[int, bytes]] = []
+        # Serializes every change to _sessions and the heap; get() only
+        # reads the dict, which is a single atomic lookup.
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get(self, session_id: bytes, now: int) -> Optional[Dict[str, Any]]:
+        """Return the cached user for an unexpired *session_id*, or None."""
+        heap = self._expiry_heap
+        if heap and heap[0][0] <= now:
+            self._reap(now)
+        
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+    
+    def insert(self, session_id: bytes, user: Dict[str, Any], expiry: int):
+        """Store a new session for *user* that expires at *expiry*."""
+        with self._lock:
+            self._sessions[session_id] = (user, expiry)
+            heapq.heappush(self._expiry_heap, (expiry, session_id))
+    
+    def remove(self, session_id: bytes) -> bool:
+        """Delete a session. Returns True if it existed."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+    
+    def _reap(self, now: int):
+        """Remove every session whose expiry is at or before *now*.
+        
+        Signed-out sessions keep their heap entry until it expires; popping
+        it then is a no-op.
+        """
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, session_id = heapq.heappop(heap)
+                entry = self._sessions.get(session_id)
+                if entry is not None and entry[1] <= now:
+                    self._sessions.pop(session_id, None)
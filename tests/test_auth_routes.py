@@ -0,0 +1,80 @@
+import importlib
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+AUTH = "/api/v1/auth"
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # main mounts ./static and importing database creates ./linear_regression.db
+    (tmp_path / "static").mkdir()
+    monkeypatch.chdir(tmp_path)
+    database = importlib.import_module("database")
+    auth_controller = importlib.import_module("auth_controller")
+    auth_routes = importlib.import_module("routes.auth_routes")
+    main = importlib.import_module("main")
+    
+    # Fresh users, models and sessions for every test
+    db = database.Database(str(tmp_path / "routes.db"))
+    monkeypatch.setattr(auth_controller, "db", db)
+    monkeypatch.setattr(auth_routes, "db", db)
+    monkeypatch.setattr(auth_controller.auth_controller, "active_sessions", auth_controller.SessionTable())
+    
+    yield TestClient(main.app)
+    db.close()
+
+def _sign_in(client) -> str:
+    client.post(f"{AUTH}/signup", data={"username": "alice", "password": "secret1"})
+    response = client.post(f"{AUTH}/signin", data={"username": "alice", "password": "secret1"})
+    assert response.status_code == 200
+    return response.cookies["session_id"]
+
+def test_signin_sets_hex_session_cookie(client):
+    session_id = _sign_in(client)
+    assert re.fullmatch(r"[0-9a-f]{32}", session_id)
+    
+    assert client.cookies["session_id"] == session_id
+    response = client.get(f"{AUTH}/me")
+    assert response.json() == {
+        "authenticated": True,
+        "user": {"id": 1, "username": "alice", "email": None}
+    }
+
+def test_me_unauthenticated(client):
+    assert client.get(f"{AUTH}/me").json() == {"authenticated": False}
+    client.cookies.set("session_id", "not-hex")
+    response = client.get(f"{AUTH}/me")
+    assert response.json() == {"authenticated": False}
+
+@pytest.mark.parametrize("session_id, detail", [
+    (None, "Authentication required"),
+    ("not-hex", "Invalid session"),
+    ("00" * 16, "Invalid session"),
+])
+def test_models_requires_session(client, session_id, detail):
+    if session_id is not None:
+        client.cookies.set("session_id", session_id)
+    response = client.get(f"{AUTH}/models")
+    assert response.status_code == 401
+    assert response.json() == {"success": False, "detail": detail}
+
+def test_signed_out_session_is_rejected(client):
+    session_id = _sign_in(client)
+    assert client.get(f"{AUTH}/models").json() == {"success": True, "models": []}
+    
+    client.post(f"{AUTH}/signout")
+    client.cookies.set("session_id", session_id)
+    response = client.get(f"{AUTH}/models")
+    assert response.status_code == 401
+    assert response.json() == {"success": False, "detail": "Invalid session"}
+
+def test_router_without_handler_still_answers_401(client):
+    app = FastAPI()
+    app.include_router(importlib.import_module("routes.auth_routes").auth_router, prefix=AUTH)
+    
+    response = TestClient(app).get(f"{AUTH}/models")
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Authentication required"}
@@ -0,0 +1,159 @@
+import hashlib
+import importlib
+import os
+import sqlite3
+
+import pytest
+
+# Schema of the models table before the equation was derived on read
+LEGACY_MODELS_SQL = '''
+    CREATE TABLE models (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        model_name TEXT NOT NULL,
+        theta_0 REAL NOT NULL,
+        theta_1 REAL NOT NULL,
+        rmse REAL NOT NULL,
+        mae REAL NOT NULL,
+        r2_score REAL NOT NULL,
+        sklearn_rmse REAL,
+        sklearn_mae REAL,
+        sklearn_r2 REAL,
+        equation TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(user_id, model_name)
+    )
+'''
+
+MODEL_DATA = {
+    "theta_0": 1.0, "theta_1": 2.0, "rmse": 0.1, "mae": 0.05, "r2_score": 0.99,
+    "sklearn_rmse": None, "sklearn_mae": None, "sklearn_r2": None
+}
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    # Importing creates the module-level db in the working directory
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("database")
+
+def _create_legacy_models(path):
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_MODELS_SQL)
+    conn.execute(
+        "INSERT INTO models (user_id, model_name, theta_0, theta_1, rmse, mae, r2_score, equation) "
+        "VALUES (1, 'old', 0.5, 3.0, 0.2, 0.1, 0.9, 'y = 3.0000x + 0.5000')"
+    )
+    conn.commit()
+    conn.close()
+
+@pytest.mark.parametrize("sqlite_version", [(3, 35, 0), (3, 34, 1)])
+def test_drops_stored_equation_column(database, tmp_path, monkeypatch, sqlite_version):
+    path = str(tmp_path / "legacy.db")
+    _create_legacy_models(path)
+    if sqlite_version > sqlite3.sqlite_version_info:
+        pytest.skip("DROP COLUMN needs SQLite 3.35+")
+    monkeypatch.setattr(database.sqlite3, "sqlite_version_info", sqlite_version)
+    
+    db = database.Database(path)
+    
+    conn = sqlite3.connect(path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(models)")}
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(models)")}
+    conn.close()
+    assert "equation" not in columns
+    assert "idx_models_user_created" in indexes
+    
+    assert db.save_model(1, "new", MODEL_DATA)
+    assert db.save_model(1, "new", MODEL_DATA)  # upsert still hits UNIQUE
+    models = {m["model_name"]: m for m in db.get_user_models(1)}
+    assert set(models) == {"old", "new"}
+    assert models["old"]["equation"] == "y = 3.0000x + 0.5000"
+    assert models["new"]["equation"] == "y = 2.0000x + 1.0000"
+    db.close()
+
+def _create_users(path, schema, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(schema)
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)"
+        if "salt" in schema else
+        "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+
+def _stored_credentials(path, username):
+    conn = sqlite3.connect(path)
+    row = conn.execute(
+        "SELECT typeof(password_hash), typeof(salt) FROM users WHERE username = ?", (username,)
+    ).fetchone()
+    conn.close()
+    return row
+
+def test_upgrades_unsalted_sha256_users(database, tmp_path):
+    path = str(tmp_path / "baseline.db")
+    _create_users(path, '''
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            email TEXT UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''', [("alice", hashlib.sha256(b"secret1").hexdigest())])
+    
+    db = database.Database(path)
+    assert _stored_credentials(path, "alice") == ("blob", "null")
+    
+    assert db.authenticate_user("alice", "wrong!") is None
+    assert db.authenticate_user("alice", "secret1")["username"] == "alice"
+    # The signin rehashed the row with a per-user salt
+    assert _stored_credentials(path, "alice") == ("blob", "blob")
+    assert db.authenticate_user("alice", "secret1")["username"] == "alice"
+    db.close()
+
+def test_converts_hex_encoded_scrypt_users(database, tmp_path):
+    path = str(tmp_path / "hex.db")
+    salt = os.urandom(database.SALT_BYTES)
+    _create_users(path, '''
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            salt TEXT,
+            email TEXT UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''', [
+        ("bob", database.db.hash_password("secret2", salt).hex(), salt.hex()),
+        ("carol", hashlib.sha256(b"secret3").hexdigest(), None)
+    ])
+    
+    db = database.Database(path)
+    assert _stored_credentials(path, "bob") == ("blob", "blob")
+    assert _stored_credentials(path, "carol") == ("blob", "null")
+    
+    assert db.authenticate_user("bob", "wrong!") is None
+    assert db.authenticate_user("bob", "secret2")["username"] == "bob"
+    assert db.authenticate_user("carol", "secret3")["username"] == "carol"
+    
+    # Running the migration again leaves converted rows alone
+    db.close()
+    db = database.Database(path)
+    assert db.authenticate_user("bob", "secret2")["username"] == "bob"
+    db.close()
+
+def test_unknown_user_still_hashes(database, tmp_path, monkeypatch):
+    db = database.Database(str(tmp_path / "users.db"))
+    assert db.create_user("dave", "secret4")
+    
+    calls = []
+    hash_password = db.hash_password
+    monkeypatch.setattr(db, "hash_password", lambda *args: calls.append(args) or hash_password(*args))
+    
+    assert db.authenticate_user("nobody", "secret4") is None
+    assert db.authenticate_user("dave", "wrong!") is None
+    assert len(calls) == 2
+    db.close()
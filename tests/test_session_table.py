@@ -0,0 +1,90 @@
+import os
+import random
+import threading
+
+from session_table import SessionTable
+
+
+def test_insert_get_remove():
+    table = SessionTable()
+    key = os.urandom(16)
+    user = {"id": 1, "username": "alice", "email": None}
+    
+    table.insert(key, user, 100)
+    assert table.get(key, 0) is user
+    assert len(table) == 1
+    
+    assert table.remove(key)
+    assert not table.remove(key)
+    assert table.get(key, 0) is None
+    assert len(table) == 0
+
+def test_expiry_reaps_sessions():
+    table = SessionTable()
+    short, long = os.urandom(16), os.urandom(16)
+    table.insert(short, {"id": 1}, 10)
+    table.insert(long, {"id": 2}, 20)
+    
+    assert table.get(short, 9) == {"id": 1}
+    assert table.get(short, 10) is None
+    assert len(table) == 1
+    assert table.get(long, 19) == {"id": 2}
+    assert table.get(long, 20) is None
+    assert len(table) == 0
+
+def test_matches_dict_model():
+    rng = random.Random(0)
+    table = SessionTable()
+    model = {}
+    keys = [os.urandom(16) for _ in range(64)]
+    now = 0
+    
+    for _ in range(5000):
+        op = rng.random()
+        key = rng.choice(keys)
+        if op < 0.4:
+            expiry = now + rng.randint(1, 50)
+            user = {"id": rng.randint(1, 1000)}
+            table.insert(key, user, expiry)
+            model[key] = (user, expiry)
+        elif op < 0.6:
+            entry = model.pop(key, None)
+            removed = table.remove(key)
+            if entry is None:
+                assert not removed
+            elif entry[1] > now:
+                assert removed
+            # An expired entry may or may not have been reaped yet
+        else:
+            now += rng.randint(0, 3)
+            entry = model.get(key)
+            expected = entry[0] if entry is not None and entry[1] > now else None
+            assert table.get(key, now) == expected
+    
+    now += 100
+    for key in keys:
+        assert table.get(key, now) is None
+    assert len(table) == 0
+
+def test_concurrent_remove_and_reap():
+    table = SessionTable()
+    keys = [os.urandom(16) for _ in range(2000)]
+    for expiry, key in enumerate(keys):
+        table.insert(key, {"id": expiry}, expiry)
+    errors = []
+    
+    def run(target):
+        try:
+            target()
+        except Exception as exc:
+            errors.append(exc)
+    
+    remover = threading.Thread(target=run, args=(lambda: [table.remove(key) for key in keys],))
+    reaper = threading.Thread(target=run, args=(lambda: [table.get(key, now) for now, key in enumerate(keys)],))
+    remover.start()
+    reaper.start()
+    remover.join()
+    reaper.join()
+    
+    assert not errors
+    assert len(table) == 0